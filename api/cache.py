@@ -0,0 +1,34 @@
+import time
+
+from settings import settings
+
+
+class ResponseCache:
+    """In-process cache of encoded bodies, keyed by tag and table version (ETag) and expired after a TTL.
+
+    Callers look entries up with the ETag computed from the table's current version counter, so a body cached
+    before a write made by another worker process is never served; ``invalidate`` only frees such entries early.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: dict[str, tuple[float, str, bytes]] = {}
+
+    def get(self, tag: str, etag: str) -> bytes | None:
+        entry = self._entries.get(tag)
+        if entry is None:
+            return None
+        expires_at, cached_etag, body = entry
+        if cached_etag != etag or expires_at < time.monotonic():
+            return None
+        return body
+
+    def set(self, tag: str, etag: str, body: bytes) -> None:
+        self._entries[tag] = (time.monotonic() + self.ttl, etag, body)
+
+    def invalidate(self, *tags: str) -> None:
+        for tag in tags:
+            self._entries.pop(tag, None)
+
+
+response_cache = ResponseCache(ttl=settings.RESPONSE_CACHE_TTL)
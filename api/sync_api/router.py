@@ -1,42 +1,116 @@
-import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
-
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
+from typing import Iterator
+from uuid import uuid4
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import Select, bindparam, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
-from db import get_db_sync
+from api.cache import response_cache
+from db import get_db_session_sync, get_db_sync
 from models import Product, User
-
-router = APIRouter(prefix="/sync", tags=["sync"])
-
-
-@router.get("/users")
-def get_users(db: Session = Depends(get_db_sync)):
+from schemas import ProductList, UserList
+
+router = APIRouter(prefix="/sync", tags=["sync"], default_response_class=ORJSONResponse)
+
+# Each concurrent benchmark thread holds one session and the request one more; running at most this many
+# threads keeps them within the engine pool (pool_size + max_overflow in db/sync_db.py)
+_MAX_WORKERS = 23
+
+# Invariant statements, built once at import time instead of on every call
+_SELECT_USERS = select(User.id, User.username, User.email, User.full_name)
+_SELECT_PRODUCTS = select(Product.id, Product.name, Product.price, Product.sku)
+_SELECT_EXPENSIVE_PRODUCTS = _SELECT_PRODUCTS.where(Product.price > 10.0).order_by(Product.price.desc())
+_SELECT_FILTERED_USERS = _SELECT_USERS.where(User.username.like("user%"))
+_SELECT_USERS_ABOVE_ID = _SELECT_USERS.where(User.id > bindparam("min_id"))
+_SELECT_PRODUCTS_ABOVE_PRICE = _SELECT_PRODUCTS.where(Product.price > bindparam("min_price"))
+_SELECT_FIRST_USER = select(User).limit(1)
+_SELECT_FIRST_PRODUCT = select(Product).limit(1)
+_DELETE_USER = delete(User).where(User.id == bindparam("user_id")).returning(User.id)
+_DELETE_PRODUCT = delete(Product).where(Product.id == bindparam("product_id")).returning(Product.id)
+_SELECT_PRODUCTS_WITH_USERS = (
+    select(Product.id, Product.name, Product.price, User.username)
+    .join(User, Product.id == User.id, isouter=True)
+    .where(Product.price > 5.0)
+)
+_SELECT_USERS_WITH_PRODUCTS = select(User.id, User.username, Product.id, Product.name, Product.price).outerjoin(
+    Product, User.id == Product.id
+)
+_SELECT_PRICE_STATS_BY_NAME = (
+    select(
+        User.full_name,
+        func.count(Product.id).label("product_count"),
+        func.avg(Product.price).label("avg_price"),
+    )
+    .select_from(User)
+    .join(Product, User.id == Product.id, isouter=True)
+    .group_by(User.full_name)
+    .having(func.avg(Product.price) > 0)
+)
+_PRICE_RANK = select(Product.id, func.rank().over(order_by=Product.price.desc()).label("price_rank")).subquery()
+_SELECT_TOP_PRICED_PRODUCTS = _SELECT_PRODUCTS.join(_PRICE_RANK, Product.id == _PRICE_RANK.c.id).where(
+    _PRICE_RANK.c.price_rank <= 5
+)
+_SELECT_USERS_ROW_NUMBER = select(
+    User.username, User.email, func.row_number().over(order_by=User.username).label("row_num")
+)
+# Rows created by one benchmark_mixed run, matched on their unique keys: cached identity ids are not
+# ordered across connections, so "highest ids" could be seed rows or another run's rows
+_DELETE_RUN_USERS = (
+    delete(User)
+    .where(User.username.in_(bindparam("usernames", expanding=True)))
+    .execution_options(synchronize_session=False)
+)
+_DELETE_RUN_PRODUCTS = (
+    delete(Product)
+    .where(Product.sku.in_(bindparam("skus", expanding=True)))
+    .execution_options(synchronize_session=False)
+)
+_STREAM_USERS = _SELECT_USERS.execution_options(yield_per=1000)
+_STREAM_PRODUCTS = _SELECT_PRODUCTS.execution_options(yield_per=1000)
+
+
+def _stream_json(key: str, stmt: Select) -> Iterator[bytes]:
+    """Encode ``{key: [rows]}`` one yield_per partition at a time instead of materializing every row."""
+    # The request's session is closed before the body is streamed, so the generator opens its own
+    with get_db_session_sync() as db:
+        yield b'{"' + key.encode() + b'":['
+        separator = b""
+        for partition in db.execute(stmt).mappings().partitions():
+            # One dumps call per partition; orjson falls back to dict() for each RowMapping, then the
+            # surrounding brackets are dropped so partitions join into a single array
+            yield separator + orjson.dumps(partition, default=dict)[1:-1]
+            separator = b","
+        yield b"]}"
+
+
+@router.get("/users", responses={200: {"model": UserList}})
+def get_users():
     """Get all users using psycopg2."""
-    users = db.query(User).all()
-    return {
-        "users": [
-            {"id": user.id, "username": user.username, "email": user.email, "full_name": user.full_name}
-            for user in users
-        ]
-    }
+    return StreamingResponse(_stream_json("users", _STREAM_USERS), media_type="application/json")
 
 
 @router.post("/users")
 def create_user(username: str, email: str, full_name: str = None, db: Session = Depends(get_db_sync)):
     """Create a new user using psycopg2."""
-    # Check if user already exists
-    existing_user = db.query(User).filter(User.username == username).first()
-    if existing_user:
+    # Insert unless the username is taken, relying on its unique index instead of a prior lookup
+    stmt = (
+        insert(User)
+        .values(username=username, email=email, full_name=full_name)
+        .on_conflict_do_nothing(index_elements=[User.username])
+        .returning(User.id, User.username, User.email, User.full_name)
+    )
+    user = db.execute(stmt).first()
+    if not user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    # Create new user
-    user = User(username=username, email=email, full_name=full_name)
-    db.add(user)
+
     db.commit()
-    db.refresh(user)
-    return {"id": user.id, "username": user.username, "email": user.email, "full_name": user.full_name}
+    response_cache.invalidate("users")
+    return user._asdict()
 
 
 @router.put("/users/{user_id}")
@@ -44,68 +118,63 @@ def update_user(
     user_id: int, username: str = None, email: str = None, full_name: str = None, db: Session = Depends(get_db_sync)
 ):
     """Update a user using psycopg2."""
-    # Get user
-    user = db.query(User).filter(User.id == user_id).first()
+    # Update only the fields that were provided
+    values = {
+        key: value
+        for key, value in (("username", username), ("email", email), ("full_name", full_name))
+        if value is not None
+    }
+    columns = (User.id, User.username, User.email, User.full_name)
+    if values:
+        stmt = update(User).where(User.id == user_id).values(**values).returning(*columns)
+    else:
+        stmt = select(*columns).where(User.id == user_id)
+
+    user = db.execute(stmt).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Update user fields if provided
-    if username is not None:
-        user.username = username
-    if email is not None:
-        user.email = email
-    if full_name is not None:
-        user.full_name = full_name
-
     db.commit()
-    db.refresh(user)
-    return {"id": user.id, "username": user.username, "email": user.email, "full_name": user.full_name}
+    response_cache.invalidate("users")
+    return user._asdict()
 
 
 @router.delete("/users/{user_id}")
 def delete_user(user_id: int, db: Session = Depends(get_db_sync)):
     """Delete a user using psycopg2."""
-    # Get user
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    # Delete in one statement; RETURNING tells whether the user existed without loading it first
+    result = db.execute(_DELETE_USER, {"user_id": user_id})
+    if not result.first():
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Delete user
-    db.delete(user)
     db.commit()
+    response_cache.invalidate("users")
     return {"message": f"User {user_id} deleted successfully"}
 
 
-@router.get("/products")
-def get_products(db: Session = Depends(get_db_sync)):
+@router.get("/products", responses={200: {"model": ProductList}})
+def get_products():
     """Get all products using psycopg2."""
-    products = db.query(Product).all()
-    return {
-        "products": [
-            {"id": product.id, "name": product.name, "price": product.price, "sku": product.sku} for product in products
-        ]
-    }
+    return StreamingResponse(_stream_json("products", _STREAM_PRODUCTS), media_type="application/json")
 
 
 @router.post("/products")
 def create_product(name: str, price: float, sku: str, description: str = None, db: Session = Depends(get_db_sync)):
     """Create a new product using psycopg2."""
-    # Check if product already exists
-    existing_product = db.query(Product).filter(Product.sku == sku).first()
-    if existing_product:
+    # Insert unless the SKU is taken, relying on its unique index instead of a prior lookup
+    stmt = (
+        insert(Product)
+        .values(name=name, price=price, sku=sku, description=description)
+        .on_conflict_do_nothing(index_elements=[Product.sku])
+        .returning(Product.id, Product.name, Product.price, Product.sku, Product.description)
+    )
+    product = db.execute(stmt).first()
+    if not product:
         raise HTTPException(status_code=400, detail="Product with this SKU already exists")
-    # Create new product
-    product = Product(name=name, price=price, sku=sku, description=description)
-    db.add(product)
+
     db.commit()
-    db.refresh(product)
-    return {
-        "id": product.id,
-        "name": product.name,
-        "price": product.price,
-        "sku": product.sku,
-        "description": product.description,
-    }
+    response_cache.invalidate("products")
+    return product._asdict()
 
 
 @router.put("/products/{product_id}")
@@ -118,58 +187,53 @@ def update_product(
     db: Session = Depends(get_db_sync),
 ):
     """Update a product using psycopg2."""
-    # Get product
-    product = db.query(Product).filter(Product.id == product_id).first()
+    # Update only the fields that were provided
+    values = {
+        key: value
+        for key, value in (("name", name), ("price", price), ("sku", sku), ("description", description))
+        if value is not None
+    }
+    columns = (Product.id, Product.name, Product.price, Product.sku, Product.description)
+    if values:
+        stmt = update(Product).where(Product.id == product_id).values(**values).returning(*columns)
+    else:
+        stmt = select(*columns).where(Product.id == product_id)
+
+    product = db.execute(stmt).first()
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    # Update product fields if provided
-    if name is not None:
-        product.name = name
-    if price is not None:
-        product.price = price
-    if sku is not None:
-        product.sku = sku
-    if description is not None:
-        product.description = description
-
     db.commit()
-    db.refresh(product)
-    return {
-        "id": product.id,
-        "name": product.name,
-        "price": product.price,
-        "sku": product.sku,
-        "description": product.description,
-    }
+    response_cache.invalidate("products")
+    return product._asdict()
 
 
 @router.delete("/products/{product_id}")
 def delete_product(product_id: int, db: Session = Depends(get_db_sync)):
     """Delete a product using psycopg2."""
-    # Get product
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if not product:
+    # Delete in one statement; RETURNING tells whether the product existed without loading it first
+    result = db.execute(_DELETE_PRODUCT, {"product_id": product_id})
+    if not result.first():
         raise HTTPException(status_code=404, detail="Product not found")
 
-    # Delete product
-    db.delete(product)
     db.commit()
+    response_cache.invalidate("products")
     return {"message": f"Product {product_id} deleted successfully"}
 
 
 @router.get("/benchmark")
 def benchmark(count: int = 100, db: Session = Depends(get_db_sync)):
     """Benchmark endpoint that performs multiple database operations using psycopg2."""
-    start_time = time.time()
+    start_time = time.perf_counter()
 
-    # Perform multiple select operations
+    # Perform multiple select operations, fetching the same column projections as the async benchmark
+    rows = 0
     for _ in range(count):
-        db.query(User).all()
-        db.query(Product).all()
+        rows += len(db.execute(_SELECT_USERS).all())
+        rows += len(db.execute(_SELECT_PRODUCTS).all())
 
     # Get execution time
-    execution_time = time.time() - start_time
+    execution_time = time.perf_counter() - start_time
 
     # Avoid division by zero
     operations_per_second = 0
@@ -179,6 +243,7 @@ def benchmark(count: int = 100, db: Session = Depends(get_db_sync)):
     return {
         "database": "psycopg2",
         "operations": count * 2,  # 2 queries per iteration
+        "rows": rows,  # Rows actually read, so a broken query can't pass for a fast one
         "execution_time_seconds": execution_time,
         "operations_per_second": operations_per_second,
     }
@@ -187,72 +252,76 @@ def benchmark(count: int = 100, db: Session = Depends(get_db_sync)):
 @router.get("/benchmark/mixed")
 def benchmark_mixed(count: int = 100, db: Session = Depends(get_db_sync)):
     """Benchmark endpoint that performs mixed database operations (INSERT, UPDATE, DELETE, GET) using psycopg2."""
-    start_time = time.time()
+    start_time = time.perf_counter()
     operations = 0
-    timestamp = int(time.time() * 1000)  # Millisecond timestamp for uniqueness
-
-    # Perform mixed operations
+    run_id = uuid4().hex  # Unique per request, so concurrent runs never collide on the unique columns
+
+    # CREATE operations (25% of operations), inserted up front as Core executemany batches and one commit
+    user_prefix = f"bench_user_{run_id}_"
+    user_name_prefix = f"Benchmark User {run_id} "
+    product_name_prefix = f"Bench Product {run_id} "
+    sku_prefix = f"BENCH-SKU-{run_id}-"
+    description_prefix = f"Benchmark product {run_id} "
+    create_indices = [(i, str(i)) for i in range(0, count, 4)]
+    user_params = [
+        {"username": user_prefix + n, "email": user_prefix + n + "@example.com", "full_name": user_name_prefix + n}
+        for _, n in create_indices
+    ]
+    product_params = [
+        {
+            "name": product_name_prefix + n,
+            "price": 10.99 + i,
+            "sku": sku_prefix + n,
+            "description": description_prefix + n,
+        }
+        for i, n in create_indices
+    ]
+    if user_params:
+        db.execute(insert(User), user_params)
+        db.execute(insert(Product), product_params)
+        db.commit()
+        operations += len(user_params) + len(product_params)
+
+    # Perform the remaining mixed operations
     for i in range(count):
-        # CREATE operation (25% of operations)
-        if i % 4 == 0:
-            user = User(
-                username=f"bench_user_{timestamp}_{i}",
-                email=f"bench_user_{timestamp}_{i}@example.com",
-                full_name=f"Benchmark User {timestamp} {i}",
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-
-            product = Product(
-                name=f"Bench Product {timestamp} {i}",
-                price=10.99 + i,
-                sku=f"BENCH-SKU-{timestamp}-{i}",
-                description=f"Benchmark product {timestamp} {i}",
-            )
-            db.add(product)
-            db.commit()
-            db.refresh(product)
-            operations += 2
-
         # READ operation (25% of operations)
-        elif i % 4 == 1:
-            db.query(User).all()
-            db.query(Product).all()
+        if i % 4 == 1:
+            # Plain rows from the shared column selects; nothing is mutated, so skip building ORM entities
+            db.execute(_SELECT_USERS).all()
+            db.execute(_SELECT_PRODUCTS).all()
             operations += 2
 
         # UPDATE operation (25% of operations)
         elif i % 4 == 2:
-            # Update first user and product if they exist
-            user = db.query(User).first()
+            # Update first user and product if they exist, committing both changes together
+            user = db.scalars(_SELECT_FIRST_USER).first()
             if user:
-                user.full_name = f"Updated User {timestamp} {i}"
-                db.commit()
+                user.full_name = f"Updated User {run_id} {i}"
                 operations += 1
 
-            product = db.query(Product).first()
+            product = db.scalars(_SELECT_FIRST_PRODUCT).first()
             if product:
                 product.price = 20.99 + i
-                db.commit()
                 operations += 1
 
-        # DELETE operation (25% of operations)
-        else:
-            # Delete last user and product if they exist
-            user = db.query(User).order_by(User.id.desc()).first()
-            if user:
-                db.delete(user)
+            if user or product:
                 db.commit()
-                operations += 1
 
-            product = db.query(Product).order_by(Product.id.desc()).first()
-            if product:
-                db.delete(product)
-                db.commit()
-                operations += 1
+    # DELETE operations (25% of operations), the last user and product this run created per operation,
+    # in one statement each
+    delete_count = len(range(3, count, 4))
+    if delete_count:
+        usernames = [params["username"] for params in user_params[-delete_count:]]
+        skus = [params["sku"] for params in product_params[-delete_count:]]
+        result_users = db.execute(_DELETE_RUN_USERS, {"usernames": usernames})
+        result_products = db.execute(_DELETE_RUN_PRODUCTS, {"skus": skus})
+        db.commit()
+        operations += result_users.rowcount + result_products.rowcount
+
+    response_cache.invalidate("users", "products")
 
     # Get execution time
-    execution_time = time.time() - start_time
+    execution_time = time.perf_counter() - start_time
 
     # Avoid division by zero
     operations_per_second = 0
@@ -270,37 +339,30 @@ def benchmark_mixed(count: int = 100, db: Session = Depends(get_db_sync)):
 @router.get("/benchmark/parallel")
 def benchmark_parallel(count: int = 100, db: Session = Depends(get_db_sync)):
     """Benchmark endpoint that performs multiple database operations in parallel using psycopg2."""
-    from db import get_db_session_sync
-
-    start_time = time.time()
+    start_time = time.perf_counter()
     operations = 0
 
     # Define query functions
     def query_users():
         with get_db_session_sync() as thread_db:
-            return thread_db.query(User).all()
+            return thread_db.execute(_SELECT_USERS).all()
 
     def query_products():
         with get_db_session_sync() as thread_db:
-            return thread_db.query(Product).filter(Product.price > 10.0).order_by(Product.price.desc()).all()
+            return thread_db.execute(_SELECT_EXPENSIVE_PRODUCTS).all()
 
     def query_users_with_filter():
         with get_db_session_sync() as thread_db:
-            return thread_db.query(User).filter(User.username.like("user%")).all()
+            return thread_db.execute(_SELECT_FILTERED_USERS).all()
 
     def query_products_with_join():
         # Simulate a more complex query with a join
         with get_db_session_sync() as thread_db:
-            return (
-                thread_db.query(Product, User)
-                .join(User, Product.id == User.id, isouter=True)
-                .filter(Product.price > 5.0)
-                .all()
-            )
-
-    # Run queries in parallel batches using ThreadPoolExecutor
-    for _ in range(count):
-        with ThreadPoolExecutor(max_workers=4) as executor:
+            return thread_db.execute(_SELECT_PRODUCTS_WITH_USERS).all()
+
+    # Run queries in parallel batches on one ThreadPoolExecutor, reusing its threads across iterations
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for _ in range(count):
             # Execute 4 queries in parallel
             futures = [
                 executor.submit(query_users),
@@ -316,7 +378,7 @@ def benchmark_parallel(count: int = 100, db: Session = Depends(get_db_sync)):
             operations += 4  # 4 queries per iteration
 
     # Get execution time
-    execution_time = time.time() - start_time
+    execution_time = time.perf_counter() - start_time
 
     # Avoid division by zero
     operations_per_second = 0
@@ -335,30 +397,24 @@ def benchmark_parallel(count: int = 100, db: Session = Depends(get_db_sync)):
 @router.get("/benchmark/complex")
 def benchmark_complex(count: int = 100, db: Session = Depends(get_db_sync)):
     """Benchmark endpoint that performs complex database operations using psycopg2."""
-    start_time = time.time()
+    start_time = time.perf_counter()
     operations = 0
 
     for _ in range(count):
         # Complex query 1: Aggregation with group by
-        db.query(
-            User.full_name, func.count(Product.id).label("product_count"), func.avg(Product.price).label("avg_price")
-        ).select_from(User).join(Product, User.id == Product.id, isouter=True).group_by(User.full_name).having(
-            func.avg(Product.price) > 0
-        ).all()
+        db.execute(_SELECT_PRICE_STATS_BY_NAME).all()
         operations += 1
 
         # Complex query 2: Subquery with order by
-        subq = db.query(Product.id, func.rank().over(order_by=Product.price.desc()).label("price_rank")).subquery()
-
-        db.query(Product).join(subq, Product.id == subq.c.id).filter(subq.c.price_rank <= 5).all()
+        db.execute(_SELECT_TOP_PRICED_PRODUCTS).all()
         operations += 1
 
         # Complex query 3: Window functions
-        db.query(User.username, User.email, func.row_number().over(order_by=User.username).label("row_num")).all()
+        db.execute(_SELECT_USERS_ROW_NUMBER).all()
         operations += 1
 
     # Get execution time
-    execution_time = time.time() - start_time
+    execution_time = time.perf_counter() - start_time
 
     # Avoid division by zero
     operations_per_second = 0
@@ -375,53 +431,37 @@ def benchmark_complex(count: int = 100, db: Session = Depends(get_db_sync)):
 
 
 @router.get("/benchmark/concurrent")
-def benchmark_concurrent(count: int = 100, concurrency: int = 10, db: Session = Depends(get_db_sync)):
+def benchmark_concurrent(count: int = 100, concurrency: int = Query(5, ge=1), db: Session = Depends(get_db_sync)):
     """Benchmark endpoint that simulates concurrent database operations using psycopg2."""
-    start_time = time.time()
-
-    # Thread-local storage for results
-    results = []
+    start_time = time.perf_counter()
 
     # Define a function that performs database operations
     def db_task(task_id):
-        # Get a new session for this thread
-        from db.sync_db import SessionLocal
-
-        thread_db = SessionLocal()
         task_operations = 0
-
-        try:
+        # Get a new session for this thread
+        with get_db_session_sync() as thread_db:
             # Perform a mix of operations
             for i in range(count // concurrency):
                 # SELECT operation
-                thread_db.query(User).filter(User.id > task_id % 5).all()
-                thread_db.query(Product).filter(Product.price > 10 + task_id % 10).all()
+                thread_db.execute(_SELECT_USERS_ABOVE_ID, {"min_id": task_id % 5}).all()
+                thread_db.execute(_SELECT_PRODUCTS_ABOVE_PRICE, {"min_price": 10 + task_id % 10}).all()
                 task_operations += 2
 
                 # More complex SELECT
-                thread_db.query(User, Product).outerjoin(Product, User.id == Product.id).all()
+                thread_db.execute(_SELECT_USERS_WITH_PRODUCTS).all()
                 task_operations += 1
 
-            return task_operations
-        finally:
-            thread_db.close()
-
-    # Create and run concurrent threads
-    threads = []
-    for i in range(concurrency):
-        thread = threading.Thread(target=lambda i=i: results.append(db_task(i)))
-        threads.append(thread)
-        thread.start()
+        return task_operations
 
-    # Wait for all threads to complete
-    for thread in threads:
-        thread.join()
+    # Run the tasks concurrently; tasks beyond the pool's capacity wait for a free worker thread
+    with ThreadPoolExecutor(max_workers=min(concurrency, _MAX_WORKERS)) as executor:
+        results = list(executor.map(db_task, range(concurrency)))
 
     # Sum up all operations
     total_operations = sum(results)
 
     # Get execution time
-    execution_time = time.time() - start_time
+    execution_time = time.perf_counter() - start_time
 
     # Avoid division by zero
     operations_per_second = 0
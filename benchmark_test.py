@@ -1,108 +1,224 @@
 import asyncio
-import json
+import sys
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from statistics import mean, median, stdev
+from math import fsum, sqrt
+from typing import NamedTuple
 
 import aiohttp
+import orjson
 import requests
 
-
-async def async_request(session, url, count):
-    """Make an async request to the benchmark endpoint."""
-    params = {"count": count}
-    async with session.get(url, params=params) as response:
-        return await response.json()
+try:
+    import uvloop
+except ImportError:  # uvloop has no Windows build; fall back to the default asyncio loop
+    uvloop = None
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared HTTP clients, so every benchmark phase reuses pooled keep-alive connections
+_sync_local = threading.local()
+_sync_sessions: list[requests.Session] = []
+_session: aiohttp.ClientSession | None = None
+
+# Advanced benchmark endpoints; per-run values go in query params so the URLs are built once
+ADVANCED_BASE_URL = "http://localhost:8000"
+PARALLEL_ASYNC_URL = f"{ADVANCED_BASE_URL}/async/benchmark/parallel"
+PARALLEL_SYNC_URL = f"{ADVANCED_BASE_URL}/sync/benchmark/parallel"
+COMPLEX_ASYNC_URL = f"{ADVANCED_BASE_URL}/async/benchmark/complex"
+COMPLEX_SYNC_URL = f"{ADVANCED_BASE_URL}/sync/benchmark/complex"
+CONCURRENT_ASYNC_URL = f"{ADVANCED_BASE_URL}/async/benchmark/concurrent"
+CONCURRENT_SYNC_URL = f"{ADVANCED_BASE_URL}/sync/benchmark/concurrent"
+
+
+async def get_session(limit_per_host=256):
+    """Return the shared aiohttp session, creating it on first use with ``limit_per_host`` sockets."""
+    global _session
+    if _session is None or _session.closed:
+        # No global socket cap, so the per-host limit (not aiohttp's default of 100) bounds the pool.
+        # Idle sockets are kept for 75s (default 15s) so they survive the gaps between benchmark phases.
+        connector = aiohttp.TCPConnector(
+            limit=0, limit_per_host=limit_per_host, ttl_dns_cache=300, keepalive_timeout=75
+        )
+        # No overall timeout: the advanced benchmarks run for minutes per request
+        _session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=None))
+    return _session
+
+
+def get_sync_session():
+    """Return the calling thread's requests session, so sync workers never share one connection pool."""
+    session = getattr(_sync_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        # Each worker has at most one request in flight, so a small keep-alive pool is enough
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=Retry(total=0))
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _sync_local.session = session
+        _sync_sessions.append(session)
+    return session
+
+
+async def aclose():
+    """Close the shared HTTP clients."""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+    while _sync_sessions:
+        _sync_sessions.pop().close()
 
 
-async def run_async_tests(base_url, counts, iterations):
+async def async_request(session, url, count):
+    """Make an async request to the benchmark endpoint, returning None if it fails."""
+    try:
+        response = await session.get(url, params={"count": count})
+        try:
+            if response.status != 200:
+                print(f"    Error with {url} (count={count}): HTTP {response.status}")
+                return None
+            return orjson.loads(await response.read())
+        finally:
+            response.release()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        # A dropped connection or timeout loses this sample only, not the phase's completed ones
+        print(f"    Error with {url} (count={count}): {e!r}")
+        return None
+
+
+async def timed_request(session, url, count):
+    """Make an async request and return its (start, end, result)."""
+    start_ns = time.perf_counter_ns()
+    result = await async_request(session, url, count)
+    end_ns = time.perf_counter_ns()
+    return start_ns, end_ns, result
+
+
+def iterations_for(count, iterations):
+    """Scale the iteration count to the request size: small, cheap counts get extra samples, the largest fewer."""
+    if count <= 1000:
+        return iterations + 2
+    if count >= 10000:
+        return max(2, iterations - 1)
+    return iterations
+
+
+class Sample(NamedTuple):
+    """One timed benchmark iteration."""
+
+    count: int
+    db: float
+    total: float
+    ops: float
+    operations: int
+
+
+async def run_async_tests(session, base_url, counts, iterations):
     """Run async tests with different counts and iterations."""
     results = []
+    url = f"{base_url}/async/benchmark"
 
-    async with aiohttp.ClientSession() as session:
-        for count in counts:
-            count_results = []
-            for _ in range(iterations):
-                start_time = time.time()
-                result = await async_request(session, f"{base_url}/async/benchmark", count)
-                end_time = time.time()
-
-                # Calculate total time including network latency
-                total_time = end_time - start_time
-
-                count_results.append(
-                    {
-                        "count": count,
-                        "db_execution_time": result["execution_time_seconds"],
-                        "total_time": total_time,
-                        "operations_per_second": result["operations_per_second"],
-                    }
+    for count in counts:
+        count_results = []
+        # Run the iterations one after another, so no sample's timing includes contention with its siblings
+        for _ in range(iterations_for(count, iterations)):
+            start_ns, end_ns, result = await timed_request(session, url, count)
+            if result is None:
+                continue
+            # Calculate total time including network latency
+            total_time = (end_ns - start_ns) / 1e9
+
+            count_results.append(
+                Sample(
+                    count,
+                    result["execution_time_seconds"],
+                    total_time,
+                    result["operations_per_second"],
+                    count * 2,
                 )
+            )
 
-            results.append(count_results)
+        results.append(count_results)
 
     return results
 
 
-async def run_async_mixed_tests(base_url, counts, iterations):
+async def run_async_mixed_tests(session, base_url, counts, iterations):
     """Run async mixed operation tests with different counts and iterations."""
     results = []
+    url = f"{base_url}/async/benchmark/mixed"
+
+    for count in counts:
+        count_results = []
+        # Run the iterations one after another, so no sample's timing includes contention with its siblings
+        for _ in range(iterations_for(count, iterations)):
+            start_ns, end_ns, result = await timed_request(session, url, count)
+            if result is None:
+                continue
+            # Calculate total time including network latency
+            total_time = (end_ns - start_ns) / 1e9
 
-    async with aiohttp.ClientSession() as session:
-        for count in counts:
-            count_results = []
-            for _ in range(iterations):
-                start_time = time.time()
-                result = await async_request(session, f"{base_url}/async/benchmark/mixed", count)
-                end_time = time.time()
-
-                # Calculate total time including network latency
-                total_time = end_time - start_time
-
-                count_results.append(
-                    {
-                        "count": count,
-                        "db_execution_time": result["execution_time_seconds"],
-                        "total_time": total_time,
-                        "operations_per_second": result["operations_per_second"],
-                        "operations": result["operations"],
-                    }
+            count_results.append(
+                Sample(
+                    count,
+                    result["execution_time_seconds"],
+                    total_time,
+                    result["operations_per_second"],
+                    result["operations"],
                 )
+            )
 
-            results.append(count_results)
+        results.append(count_results)
 
     return results
 
 
 def sync_request(url, count):
-    """Make a sync request to the benchmark endpoint."""
+    """Make a sync request to the benchmark endpoint, returning None if it fails."""
     params = {"count": count}
-    response = requests.get(url, params=params)
-    return response.json()
+    try:
+        response = get_sync_session().get(url, params=params)
+    except requests.RequestException as e:
+        print(f"    Error with {url} (count={count}): {e!r}")
+        return None
+    if response.status_code != 200:
+        print(f"    Error with {url} (count={count}): HTTP {response.status_code}")
+        return None
+    return orjson.loads(response.content)
+
+
+def timed_sync_request(url, count):
+    """Make a sync request and return its (start, end, result)."""
+    start_ns = time.perf_counter_ns()
+    result = sync_request(url, count)
+    end_ns = time.perf_counter_ns()
+    return start_ns, end_ns, result
 
 
 def run_sync_tests(base_url, counts, iterations):
     """Run sync tests with different counts and iterations."""
     results = []
+    url = f"{base_url}/sync/benchmark"
 
     for count in counts:
         count_results = []
-        for _ in range(iterations):
-            start_time = time.time()
-            result = sync_request(f"{base_url}/sync/benchmark", count)
-            end_time = time.time()
-
+        # Run the iterations one after another, so no sample's timing includes contention with its siblings
+        for _ in range(iterations_for(count, iterations)):
+            start_ns, end_ns, result = timed_sync_request(url, count)
+            if result is None:
+                continue
             # Calculate total time including network latency
-            total_time = end_time - start_time
+            total_time = (end_ns - start_ns) / 1e9
 
             count_results.append(
-                {
-                    "count": count,
-                    "db_execution_time": result["execution_time_seconds"],
-                    "total_time": total_time,
-                    "operations_per_second": result["operations_per_second"],
-                }
+                Sample(
+                    count,
+                    result["execution_time_seconds"],
+                    total_time,
+                    result["operations_per_second"],
+                    count * 2,
+                )
             )
 
         results.append(count_results)
@@ -113,25 +229,26 @@ def run_sync_tests(base_url, counts, iterations):
 def run_sync_mixed_tests(base_url, counts, iterations):
     """Run sync mixed operation tests with different counts and iterations."""
     results = []
+    url = f"{base_url}/sync/benchmark/mixed"
 
     for count in counts:
         count_results = []
-        for _ in range(iterations):
-            start_time = time.time()
-            result = sync_request(f"{base_url}/sync/benchmark/mixed", count)
-            end_time = time.time()
-
+        # Run the iterations one after another, so no sample's timing includes contention with its siblings
+        for _ in range(iterations_for(count, iterations)):
+            start_ns, end_ns, result = timed_sync_request(url, count)
+            if result is None:
+                continue
             # Calculate total time including network latency
-            total_time = end_time - start_time
+            total_time = (end_ns - start_ns) / 1e9
 
             count_results.append(
-                {
-                    "count": count,
-                    "db_execution_time": result["execution_time_seconds"],
-                    "total_time": total_time,
-                    "operations_per_second": result["operations_per_second"],
-                    "operations": result["operations"],
-                }
+                Sample(
+                    count,
+                    result["execution_time_seconds"],
+                    total_time,
+                    result["operations_per_second"],
+                    result["operations"],
+                )
             )
 
         results.append(count_results)
@@ -139,6 +256,33 @@ def run_sync_mixed_tests(base_url, counts, iterations):
     return results
 
 
+def _mean_std(samples):
+    """Mean and sample standard deviation from running sums, without statistics' two-pass Fraction math."""
+    n = len(samples)
+    m = fsum(samples) / n
+    if n < 2:
+        return m, 0.0
+    var = max(0.0, (fsum(x * x for x in samples) - n * m * m) / (n - 1))
+    return m, sqrt(var)
+
+
+def percentiles(samples):
+    """Summarize samples by nearest-rank percentiles from a single sort, plus min/max/mean/std."""
+    s = sorted(samples)
+    n = len(s)
+    mean, std = _mean_std(s)
+    return {
+        "p50": s[n // 2],
+        "p90": s[min(n - 1, int(n * 0.9))],
+        "p95": s[min(n - 1, int(n * 0.95))],
+        "p99": s[min(n - 1, int(n * 0.99))],
+        "min": s[0],
+        "max": s[-1],
+        "mean": mean,
+        "std": std,
+    }
+
+
 def analyze_results(results, test_type):
     """Analyze test results and return statistics."""
     analysis = []
@@ -147,13 +291,16 @@ def analyze_results(results, test_type):
         if not count_results:
             continue
 
-        count = count_results[0]["count"]
-        db_times = [r["db_execution_time"] for r in count_results]
-        total_times = [r["total_time"] for r in count_results]
-        ops_per_second = [r["operations_per_second"] for r in count_results]
+        count = count_results[0].count
+        # One pass over the iteration results fills all three series
+        db_times, total_times, ops_per_second = [], [], []
+        for r in count_results:
+            db_times.append(r.db)
+            total_times.append(r.total)
+            ops_per_second.append(r.ops)
 
-        # Get operations count if available (for mixed tests)
-        operations = count_results[0].get("operations", count * 2)
+        # Mixed tests report their own operation count; standard ones record count * 2
+        operations = count_results[0].operations
 
         analysis.append(
             {
@@ -161,27 +308,9 @@ def analyze_results(results, test_type):
                 "count": count,
                 "operations": operations,
                 "iterations": len(count_results),
-                "db_execution_time": {
-                    "mean": mean(db_times),
-                    "median": median(db_times),
-                    "min": min(db_times),
-                    "max": max(db_times),
-                    "stdev": stdev(db_times) if len(db_times) > 1 else 0,
-                },
-                "total_time": {
-                    "mean": mean(total_times),
-                    "median": median(total_times),
-                    "min": min(total_times),
-                    "max": max(total_times),
-                    "stdev": stdev(total_times) if len(total_times) > 1 else 0,
-                },
-                "operations_per_second": {
-                    "mean": mean(ops_per_second),
-                    "median": median(ops_per_second),
-                    "min": min(ops_per_second),
-                    "max": max(ops_per_second),
-                    "stdev": stdev(ops_per_second) if len(ops_per_second) > 1 else 0,
-                },
+                "db_execution_time": percentiles(db_times),
+                "total_time": percentiles(total_times),
+                "operations_per_second": percentiles(ops_per_second),
             }
         )
 
@@ -198,22 +327,23 @@ def generate_report(async_analysis, sync_analysis, test_type="standard"):
     total_diff_percent = 0
     comparison_count = 0
 
+    sync_by_count = {r["count"]: r for r in sync_analysis}
     for async_result in async_analysis:
         count = async_result["count"]
-        sync_result = next((r for r in sync_analysis if r["count"] == count), None)
+        sync_result = sync_by_count.get(count)
 
         if sync_result:
-            # Calculate performance difference
-            async_mean_ops = async_result["operations_per_second"]["mean"]
-            sync_mean_ops = sync_result["operations_per_second"]["mean"]
+            # Calculate performance difference on the medians; throughput samples are skewed by slow runs
+            async_p50_ops = async_result["operations_per_second"]["p50"]
+            sync_p50_ops = sync_result["operations_per_second"]["p50"]
 
-            if sync_mean_ops > 0:
-                performance_diff_percent = ((async_mean_ops - sync_mean_ops) / sync_mean_ops) * 100
+            if sync_p50_ops > 0:
+                performance_diff_percent = ((async_p50_ops - sync_p50_ops) / sync_p50_ops) * 100
             else:
-                performance_diff_percent = float("inf") if async_mean_ops > 0 else 0
+                performance_diff_percent = float("inf") if async_p50_ops > 0 else 0
 
             # Track wins and total difference for summary
-            if async_mean_ops > sync_mean_ops:
+            if async_p50_ops > sync_p50_ops:
                 async_wins += 1
             else:
                 sync_wins += 1
@@ -225,10 +355,10 @@ def generate_report(async_analysis, sync_analysis, test_type="standard"):
                 {
                     "count": count,
                     "operations": async_result.get("operations", count * 2),
-                    "async_ops_per_second": async_mean_ops,
-                    "sync_ops_per_second": sync_mean_ops,
+                    "async_ops_per_second": async_p50_ops,
+                    "sync_ops_per_second": sync_p50_ops,
                     "performance_difference_percent": performance_diff_percent,
-                    "faster": "async" if async_mean_ops > sync_mean_ops else "sync",
+                    "faster": "async" if async_p50_ops > sync_p50_ops else "sync",
                 }
             )
 
@@ -243,25 +373,57 @@ def generate_report(async_analysis, sync_analysis, test_type="standard"):
     return report
 
 
-def print_comparison_table(report):
-    """Print a formatted comparison table for the report."""
-    print(f"\n=== {report['test_type'].upper()} BENCHMARK RESULTS SUMMARY ===\n")
-    print("Operations per second (higher is better):\n")
+# Row layout for print_comparison_table: count, async ops/s, sync ops/s, diff %, faster
+_TABLE_ROW = "{:<10} {:<15.2f} {:<15.2f} {:<10} {}".format
 
-    print(f"{'Count':<10} {'Async':<15} {'Sync':<15} {'Diff %':<10} {'Faster'}")
-    print("-" * 60)
 
+def print_comparison_table(report):
+    """Print a formatted comparison table for the report, written to stdout in one call."""
+    rows = [
+        f"\n=== {report['test_type'].upper()} BENCHMARK RESULTS SUMMARY ===\n",
+        "Median operations per second (higher is better):\n",
+        f"{'Count':<10} {'Async':<15} {'Sync':<15} {'Diff %':<10} {'Faster'}",
+        "-" * 60,
+    ]
     for comp in sorted(report["comparison"], key=lambda x: x["count"]):
-        diff_percent = f"{comp['performance_difference_percent']:.2f}%"
-        print(
-            f"{comp['count']:<10} {comp['async_ops_per_second']:<15.2f} {comp['sync_ops_per_second']:<15.2f} "
-            f"{diff_percent:<10} {comp['faster']}"
+        rows.append(
+            _TABLE_ROW(
+                comp["count"],
+                comp["async_ops_per_second"],
+                comp["sync_ops_per_second"],
+                f"{comp['performance_difference_percent']:.2f}%",
+                comp["faster"],
+            )
         )
+    sys.stdout.write("\n".join(rows) + "\n")
+
+
+async def fetch_json(session, url, params):
+    """GET a benchmark URL and return its status code and decoded JSON body (None unless 200)."""
+    response = await session.get(url, params=params)
+    try:
+        if response.status != 200:
+            return response.status, None
+        return response.status, orjson.loads(await response.read())
+    finally:
+        response.release()
+
+
+class Result(NamedTuple):
+    """An advanced benchmark outcome: throughput, or the error that prevented it."""
+
+    ops: float
+    err: str | None = None
+
+    @classmethod
+    def from_json(cls, body):
+        return cls(body.get("operations_per_second", 0.0), body.get("error"))
 
 
 async def run_advanced_benchmarks():
     """Run advanced benchmarks for both async and sync APIs."""
     print("Running advanced benchmarks...")
+    session = await get_session()
 
     # Test configurations
     test_counts = [10000]  # Increased to 10k
@@ -282,27 +444,23 @@ async def run_advanced_benchmarks():
 
             try:
                 # Async API
-                url = f"http://localhost:8000/async/benchmark/parallel?count={count}"
-                async_response = requests.get(url)
-                if async_response.status_code == 200:
-                    async_result = async_response.json()
-                    results["parallel"]["async"][count] = async_result
+                async_status, async_result = await fetch_json(session, PARALLEL_ASYNC_URL, {"count": count})
+                if async_status == 200:
+                    results["parallel"]["async"][count] = Result.from_json(async_result)
                 else:
-                    print(f"    Error with async parallel benchmark: {async_response.status_code}")
-                    results["parallel"]["async"][count] = {"error": f"HTTP {async_response.status_code}"}
+                    print(f"    Error with async parallel benchmark: {async_status}")
+                    results["parallel"]["async"][count] = Result(0.0, f"HTTP {async_status}")
 
                 # Sync API
-                url = f"http://localhost:8000/sync/benchmark/parallel?count={count}"
-                sync_response = requests.get(url)
-                if sync_response.status_code == 200:
-                    sync_result = sync_response.json()
-                    results["parallel"]["sync"][count] = sync_result
+                sync_status, sync_result = await fetch_json(session, PARALLEL_SYNC_URL, {"count": count})
+                if sync_status == 200:
+                    results["parallel"]["sync"][count] = Result.from_json(sync_result)
                 else:
-                    print(f"    Error with sync parallel benchmark: {sync_response.status_code}")
-                    results["parallel"]["sync"][count] = {"error": f"HTTP {sync_response.status_code}"}
+                    print(f"    Error with sync parallel benchmark: {sync_status}")
+                    results["parallel"]["sync"][count] = Result(0.0, f"HTTP {sync_status}")
 
                 # Calculate percentage difference if both results are available
-                if async_response.status_code == 200 and sync_response.status_code == 200:
+                if async_status == 200 and sync_status == 200:
                     async_ops = async_result["operations_per_second"]
                     sync_ops = sync_result["operations_per_second"]
 
@@ -314,8 +472,8 @@ async def run_advanced_benchmarks():
                         )
             except Exception as e:
                 print(f"    Error running parallel benchmark with count {count}: {str(e)}")
-                results["parallel"]["async"][count] = {"error": str(e)}
-                results["parallel"]["sync"][count] = {"error": str(e)}
+                results["parallel"]["async"][count] = Result(0.0, str(e))
+                results["parallel"]["sync"][count] = Result(0.0, str(e))
 
         # Run complex benchmarks
         print("\nRunning complex query benchmarks...")
@@ -324,27 +482,23 @@ async def run_advanced_benchmarks():
 
             try:
                 # Async API
-                url = f"http://localhost:8000/async/benchmark/complex?count={count}"
-                async_response = requests.get(url)
-                if async_response.status_code == 200:
-                    async_result = async_response.json()
-                    results["complex"]["async"][count] = async_result
+                async_status, async_result = await fetch_json(session, COMPLEX_ASYNC_URL, {"count": count})
+                if async_status == 200:
+                    results["complex"]["async"][count] = Result.from_json(async_result)
                 else:
-                    print(f"    Error with async complex benchmark: {async_response.status_code}")
-                    results["complex"]["async"][count] = {"error": f"HTTP {async_response.status_code}"}
+                    print(f"    Error with async complex benchmark: {async_status}")
+                    results["complex"]["async"][count] = Result(0.0, f"HTTP {async_status}")
 
                 # Sync API
-                url = f"http://localhost:8000/sync/benchmark/complex?count={count}"
-                sync_response = requests.get(url)
-                if sync_response.status_code == 200:
-                    sync_result = sync_response.json()
-                    results["complex"]["sync"][count] = sync_result
+                sync_status, sync_result = await fetch_json(session, COMPLEX_SYNC_URL, {"count": count})
+                if sync_status == 200:
+                    results["complex"]["sync"][count] = Result.from_json(sync_result)
                 else:
-                    print(f"    Error with sync complex benchmark: {sync_response.status_code}")
-                    results["complex"]["sync"][count] = {"error": f"HTTP {sync_response.status_code}"}
+                    print(f"    Error with sync complex benchmark: {sync_status}")
+                    results["complex"]["sync"][count] = Result(0.0, f"HTTP {sync_status}")
 
                 # Calculate percentage difference if both results are available
-                if async_response.status_code == 200 and sync_response.status_code == 200:
+                if async_status == 200 and sync_status == 200:
                     async_ops = async_result["operations_per_second"]
                     sync_ops = sync_result["operations_per_second"]
 
@@ -356,50 +510,43 @@ async def run_advanced_benchmarks():
                         )
             except Exception as e:
                 print(f"    Error running complex benchmark with count {count}: {str(e)}")
-                results["complex"]["async"][count] = {"error": str(e)}
-                results["complex"]["sync"][count] = {"error": str(e)}
+                results["complex"]["async"][count] = Result(0.0, str(e))
+                results["complex"]["sync"][count] = Result(0.0, str(e))
 
         # Run concurrent benchmarks
         print("\nRunning concurrent benchmarks...")
         for count in [100000]:  # Increased to 100k
             for concurrency in concurrency_levels:
                 print(f"  Testing with {count} operations and {concurrency} concurrent clients...")
+                params = {"count": count, "concurrency": concurrency}
 
                 try:
                     # Async API
-                    url = f"http://localhost:8000/async/benchmark/concurrent?count={count}&concurrency={concurrency}"
-                    async_response = requests.get(url)
-                    if async_response.status_code == 200:
-                        async_result = async_response.json()
+                    async_status, async_result = await fetch_json(session, CONCURRENT_ASYNC_URL, params)
+                    if async_status == 200:
                         if count not in results["concurrent"]["async"]:
                             results["concurrent"]["async"][count] = {}
-                        results["concurrent"]["async"][count][concurrency] = async_result
+                        results["concurrent"]["async"][count][concurrency] = Result.from_json(async_result)
                     else:
-                        print(f"    Error with async concurrent benchmark: {async_response.status_code}")
+                        print(f"    Error with async concurrent benchmark: {async_status}")
                         if count not in results["concurrent"]["async"]:
                             results["concurrent"]["async"][count] = {}
-                        results["concurrent"]["async"][count][concurrency] = {
-                            "error": f"HTTP {async_response.status_code}"
-                        }
+                        results["concurrent"]["async"][count][concurrency] = Result(0.0, f"HTTP {async_status}")
 
                     # Sync API
-                    url = f"http://localhost:8000/sync/benchmark/concurrent?count={count}&concurrency={concurrency}"
-                    sync_response = requests.get(url)
-                    if sync_response.status_code == 200:
-                        sync_result = sync_response.json()
+                    sync_status, sync_result = await fetch_json(session, CONCURRENT_SYNC_URL, params)
+                    if sync_status == 200:
                         if count not in results["concurrent"]["sync"]:
                             results["concurrent"]["sync"][count] = {}
-                        results["concurrent"]["sync"][count][concurrency] = sync_result
+                        results["concurrent"]["sync"][count][concurrency] = Result.from_json(sync_result)
                     else:
-                        print(f"    Error with sync concurrent benchmark: {sync_response.status_code}")
+                        print(f"    Error with sync concurrent benchmark: {sync_status}")
                         if count not in results["concurrent"]["sync"]:
                             results["concurrent"]["sync"][count] = {}
-                        results["concurrent"]["sync"][count][concurrency] = {
-                            "error": f"HTTP {sync_response.status_code}"
-                        }
+                        results["concurrent"]["sync"][count][concurrency] = Result(0.0, f"HTTP {sync_status}")
 
                     # Calculate percentage difference if both results are available
-                    if async_response.status_code == 200 and sync_response.status_code == 200:
+                    if async_status == 200 and sync_status == 200:
                         async_ops = async_result["operations_per_second"]
                         sync_ops = sync_result["operations_per_second"]
 
@@ -416,8 +563,8 @@ async def run_advanced_benchmarks():
                         results["concurrent"]["async"][count] = {}
                     if count not in results["concurrent"]["sync"]:
                         results["concurrent"]["sync"][count] = {}
-                    results["concurrent"]["async"][count][concurrency] = {"error": str(e)}
-                    results["concurrent"]["sync"][count][concurrency] = {"error": str(e)}
+                    results["concurrent"]["async"][count][concurrency] = Result(0.0, str(e))
+                    results["concurrent"]["sync"][count][concurrency] = Result(0.0, str(e))
     except Exception as e:
         print(f"Error running advanced benchmarks: {str(e)}")
 
@@ -443,38 +590,37 @@ def analyze_advanced_results(results):
     total_diff_percent = 0
     comparison_count = 0
 
-    for count in results["parallel"]["async"]:
-        if isinstance(count, int):
-            async_result = results["parallel"]["async"][count]
-            sync_result = results["parallel"]["sync"][count]
+    # Result dicts are keyed only by int counts, so no per-key type check is needed
+    for count, async_result in results["parallel"]["async"].items():
+        sync_result = results["parallel"]["sync"][count]
 
-            # Skip error results
-            if "error" in async_result or "error" in sync_result:
-                continue
+        # Skip error results
+        if async_result.err or sync_result.err:
+            continue
 
-            async_ops = async_result.get("operations_per_second", 0)
-            sync_ops = sync_result.get("operations_per_second", 0)
+        async_ops = async_result.ops
+        sync_ops = sync_result.ops
 
-            # Avoid division by zero
-            if sync_ops > 0:
-                percentage_diff = ((async_ops - sync_ops) / sync_ops) * 100
-            else:
-                percentage_diff = 100 if async_ops > 0 else 0
+        # Avoid division by zero
+        if sync_ops > 0:
+            percentage_diff = ((async_ops - sync_ops) / sync_ops) * 100
+        else:
+            percentage_diff = 100 if async_ops > 0 else 0
 
-            analysis["parallel"][count] = {
-                "async": async_ops,
-                "sync": sync_ops,
-                "percentage_diff": percentage_diff,
-                "faster": "asyncpg" if async_ops > sync_ops else "psycopg2",
-            }
+        analysis["parallel"][count] = {
+            "async": async_ops,
+            "sync": sync_ops,
+            "percentage_diff": percentage_diff,
+            "faster": "asyncpg" if async_ops > sync_ops else "psycopg2",
+        }
 
-            if async_ops > sync_ops:
-                async_wins += 1
-            else:
-                sync_wins += 1
+        if async_ops > sync_ops:
+            async_wins += 1
+        else:
+            sync_wins += 1
 
-            total_diff_percent += percentage_diff
-            comparison_count += 1
+        total_diff_percent += percentage_diff
+        comparison_count += 1
 
     # Set overall results for parallel benchmarks
     if comparison_count > 0:
@@ -490,38 +636,36 @@ def analyze_advanced_results(results):
     total_diff_percent = 0
     comparison_count = 0
 
-    for count in results["complex"]["async"]:
-        if isinstance(count, int):
-            async_result = results["complex"]["async"][count]
-            sync_result = results["complex"]["sync"][count]
+    for count, async_result in results["complex"]["async"].items():
+        sync_result = results["complex"]["sync"][count]
 
-            # Skip error results
-            if "error" in async_result or "error" in sync_result:
-                continue
+        # Skip error results
+        if async_result.err or sync_result.err:
+            continue
 
-            async_ops = async_result.get("operations_per_second", 0)
-            sync_ops = sync_result.get("operations_per_second", 0)
+        async_ops = async_result.ops
+        sync_ops = sync_result.ops
 
-            # Avoid division by zero
-            if sync_ops > 0:
-                percentage_diff = ((async_ops - sync_ops) / sync_ops) * 100
-            else:
-                percentage_diff = 100 if async_ops > 0 else 0
+        # Avoid division by zero
+        if sync_ops > 0:
+            percentage_diff = ((async_ops - sync_ops) / sync_ops) * 100
+        else:
+            percentage_diff = 100 if async_ops > 0 else 0
 
-            analysis["complex"][count] = {
-                "async": async_ops,
-                "sync": sync_ops,
-                "percentage_diff": percentage_diff,
-                "faster": "asyncpg" if async_ops > sync_ops else "psycopg2",
-            }
+        analysis["complex"][count] = {
+            "async": async_ops,
+            "sync": sync_ops,
+            "percentage_diff": percentage_diff,
+            "faster": "asyncpg" if async_ops > sync_ops else "psycopg2",
+        }
 
-            if async_ops > sync_ops:
-                async_wins += 1
-            else:
-                sync_wins += 1
+        if async_ops > sync_ops:
+            async_wins += 1
+        else:
+            sync_wins += 1
 
-            total_diff_percent += percentage_diff
-            comparison_count += 1
+        total_diff_percent += percentage_diff
+        comparison_count += 1
 
     # Set overall results for complex benchmarks
     if comparison_count > 0:
@@ -540,56 +684,53 @@ def analyze_advanced_results(results):
     # Also analyze by concurrency level
     concurrency_analysis = {}
 
-    for count in results["concurrent"]["async"]:
-        if isinstance(count, int):
-            analysis["concurrent"][count] = {}
-            for concurrency, result in results["concurrent"]["async"][count].items():
-                sync_result = results["concurrent"]["sync"][count][concurrency]
+    sync_concurrent = results["concurrent"]["sync"]
+    for count, async_by_concurrency in results["concurrent"]["async"].items():
+        count_analysis = analysis["concurrent"][count] = {}
+        # Pair results by concurrency level; a level missing on the sync side is skipped rather than a KeyError
+        sync_by_concurrency = sync_concurrent.get(count, {})
+        for concurrency, result in async_by_concurrency.items():
+            sync_result = sync_by_concurrency.get(concurrency)
 
-                # Skip error results
-                if "error" in result or "error" in sync_result:
-                    continue
+            # Skip missing or error results
+            if sync_result is None or result.err or sync_result.err:
+                continue
 
-                async_ops = result.get("operations_per_second", 0)
-                sync_ops = sync_result.get("operations_per_second", 0)
+            async_ops = result.ops
+            sync_ops = sync_result.ops
 
-                # Avoid division by zero
-                if sync_ops > 0:
-                    percentage_diff = ((async_ops - sync_ops) / sync_ops) * 100
-                else:
-                    percentage_diff = 100 if async_ops > 0 else 0
+            # Avoid division by zero
+            if sync_ops > 0:
+                percentage_diff = ((async_ops - sync_ops) / sync_ops) * 100
+            else:
+                percentage_diff = 100 if async_ops > 0 else 0
 
-                analysis["concurrent"][count][concurrency] = {
-                    "async": async_ops,
-                    "sync": sync_ops,
-                    "percentage_diff": percentage_diff,
-                    "faster": "asyncpg" if async_ops > sync_ops else "psycopg2",
-                }
+            count_analysis[concurrency] = {
+                "async": async_ops,
+                "sync": sync_ops,
+                "percentage_diff": percentage_diff,
+                "faster": "asyncpg" if async_ops > sync_ops else "psycopg2",
+            }
 
-                if async_ops > sync_ops:
-                    async_wins += 1
-                else:
-                    sync_wins += 1
-
-                total_diff_percent += percentage_diff
-                comparison_count += 1
-
-                # Track by concurrency level
-                if concurrency not in concurrency_analysis:
-                    concurrency_analysis[concurrency] = {
-                        "async_wins": 0,
-                        "sync_wins": 0,
-                        "total_diff_percent": 0,
-                        "comparison_count": 0,
-                    }
-
-                if async_ops > sync_ops:
-                    concurrency_analysis[concurrency]["async_wins"] += 1
-                else:
-                    concurrency_analysis[concurrency]["sync_wins"] += 1
+            if async_ops > sync_ops:
+                async_wins += 1
+            else:
+                sync_wins += 1
 
-                concurrency_analysis[concurrency]["total_diff_percent"] += percentage_diff
-                concurrency_analysis[concurrency]["comparison_count"] += 1
+            total_diff_percent += percentage_diff
+            comparison_count += 1
+
+            # Track by concurrency level
+            level = concurrency_analysis.setdefault(
+                concurrency, {"async_wins": 0, "sync_wins": 0, "total_diff_percent": 0, "comparison_count": 0}
+            )
+            if async_ops > sync_ops:
+                level["async_wins"] += 1
+            else:
+                level["sync_wins"] += 1
+
+            level["total_diff_percent"] += percentage_diff
+            level["comparison_count"] += 1
 
     # Set overall results for concurrent benchmarks
     if comparison_count > 0:
@@ -619,6 +760,33 @@ def analyze_advanced_results(results):
     return analysis
 
 
+def _accumulate(results):
+    """Tally wins and the summed absolute difference of per-count comparison results in one pass."""
+    totals = {"asyncpg_faster_count": 0, "psycopg2_faster_count": 0, "total_abs_diff": 0.0, "total_tests": 0}
+    for result in results:
+        if result["faster"] == "asyncpg":
+            totals["asyncpg_faster_count"] += 1
+        else:
+            totals["psycopg2_faster_count"] += 1
+        totals["total_abs_diff"] += abs(result["percentage_diff"])
+        totals["total_tests"] += 1
+    return totals
+
+
+def _summarize(totals):
+    """Turn accumulated totals into a report summary."""
+    asyncpg_faster_count = totals["asyncpg_faster_count"]
+    psycopg2_faster_count = totals["psycopg2_faster_count"]
+    total_tests = totals["total_tests"]
+    return {
+        "asyncpg_faster_count": asyncpg_faster_count,
+        "psycopg2_faster_count": psycopg2_faster_count,
+        "total_tests": total_tests,
+        "avg_percentage_diff": totals["total_abs_diff"] / total_tests if total_tests > 0 else 0,
+        "overall_faster": "asyncpg" if asyncpg_faster_count > psycopg2_faster_count else "psycopg2",
+    }
+
+
 def generate_advanced_report(analysis):
     """Generate a report from the advanced benchmark analysis."""
     report = {
@@ -647,95 +815,46 @@ def generate_advanced_report(analysis):
 
     # Add summary for each benchmark type
     for benchmark_type in ["parallel", "complex", "concurrent"]:
-        if benchmark_type != "concurrent":
-            # Count how many times each driver was faster
-            asyncpg_faster_count = sum(
-                1 for result in analysis[benchmark_type].values() if result["faster"] == "asyncpg"
-            )
-            psycopg2_faster_count = sum(
-                1 for result in analysis[benchmark_type].values() if result["faster"] == "psycopg2"
-            )
-            total_tests = len(analysis[benchmark_type])
-
-            # Calculate average percentage difference
-            avg_diff = sum(abs(result["percentage_diff"]) for result in analysis[benchmark_type].values()) / total_tests
+        # Only the integer count keys hold comparisons; the rest are the analysis' own summary fields
+        count_results = [result for count, result in analysis[benchmark_type].items() if type(count) is int]
 
-            report[benchmark_type]["summary"] = {
-                "asyncpg_faster_count": asyncpg_faster_count,
-                "psycopg2_faster_count": psycopg2_faster_count,
-                "total_tests": total_tests,
-                "avg_percentage_diff": avg_diff,
-                "overall_faster": "asyncpg" if asyncpg_faster_count > psycopg2_faster_count else "psycopg2",
-            }
+        if benchmark_type != "concurrent":
+            summary = _summarize(_accumulate(count_results))
         else:
-            # For concurrent benchmarks, analyze by concurrency level
-            asyncpg_faster_count = 0
-            psycopg2_faster_count = 0
-            total_tests = 0
-
-            # Track performance by concurrency level
-            concurrency_analysis = {}
-
-            for count_results in analysis[benchmark_type].values():
-                for concurrency, result in count_results.items():
-                    if concurrency not in concurrency_analysis:
-                        concurrency_analysis[concurrency] = {
-                            "asyncpg_faster_count": 0,
-                            "psycopg2_faster_count": 0,
-                            "total_tests": 0,
-                            "avg_percentage_diff": 0,
-                        }
-
-                    if result["faster"] == "asyncpg":
-                        asyncpg_faster_count += 1
-                        concurrency_analysis[concurrency]["asyncpg_faster_count"] += 1
-                    else:
-                        psycopg2_faster_count += 1
-                        concurrency_analysis[concurrency]["psycopg2_faster_count"] += 1
-
-                    concurrency_analysis[concurrency]["total_tests"] += 1
-                    concurrency_analysis[concurrency]["avg_percentage_diff"] += abs(result["percentage_diff"])
-                    total_tests += 1
-
-            # Calculate averages for each concurrency level
-            for concurrency, analysis_data in concurrency_analysis.items():
-                if analysis_data["total_tests"] > 0:
-                    analysis_data["avg_percentage_diff"] /= analysis_data["total_tests"]
-                    analysis_data["overall_faster"] = (
-                        "asyncpg"
-                        if analysis_data["asyncpg_faster_count"] > analysis_data["psycopg2_faster_count"]
-                        else "psycopg2"
-                    )
-
-            # Calculate overall average percentage difference
-            avg_diff = (
-                sum(
-                    abs(result["percentage_diff"])
-                    for count_results in analysis[benchmark_type].values()
-                    for result in count_results.values()
-                )
-                / total_tests
-                if total_tests > 0
-                else 0
-            )
-
-            report[benchmark_type]["summary"] = {
-                "asyncpg_faster_count": asyncpg_faster_count,
-                "psycopg2_faster_count": psycopg2_faster_count,
-                "total_tests": total_tests,
-                "avg_percentage_diff": avg_diff,
-                "overall_faster": "asyncpg" if asyncpg_faster_count > psycopg2_faster_count else "psycopg2",
-                "concurrency_analysis": concurrency_analysis,
+            # For concurrent benchmarks, also analyze by concurrency level
+            by_concurrency = {}
+            for results_by_concurrency in count_results:
+                for concurrency, result in results_by_concurrency.items():
+                    by_concurrency.setdefault(concurrency, []).append(result)
+
+            concurrency_analysis = {
+                concurrency: _summarize(_accumulate(results)) for concurrency, results in by_concurrency.items()
             }
+            summary = _summarize(_accumulate(r for results in by_concurrency.values() for r in results))
+            summary["concurrency_analysis"] = concurrency_analysis
+
+        report[benchmark_type]["summary"] = summary
 
     return report
 
 
+def dump_report(path, report):
+    """Write a report as indented JSON bytes; int keys (counts, concurrency levels) become strings."""
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+
+
+def append_rows(path, rows, mode="ab"):
+    """Write analyzed per-count rows as JSON Lines, so each phase's results land on disk as soon as they exist."""
+    with open(path, mode) as f:
+        f.write(b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows))
+
+
 async def main():
     """Main function to run all benchmarks."""
     print("Starting benchmark tests...")
 
-    # Run standard benchmarks
+    # Run standard benchmarks; iterations are the baseline that iterations_for() scales per count
     base_url = "http://localhost:8000"
     standard_counts = [10, 50, 100, 500, 1000, 2000, 5000, 10000, 20000, 50000]
     standard_iterations = 3
@@ -750,7 +869,7 @@ async def main():
     # Test verisi oluşturmayı atlayalım
     # print("Creating test data...")
     # for i in range(20):
-    #     requests.post(
+    #     get_sync_session().post(
     #         f"{base_url}/async/products",
     #         params={
     #             "name": f"Product {i}",
@@ -762,34 +881,31 @@ async def main():
 
     # Run standard tests (SELECT operations only)
     print("\nRunning standard async tests...")
-    async_results = await run_async_tests(base_url, standard_counts, standard_iterations)
+    session = await get_session()
+    async_results = await run_async_tests(session, base_url, standard_counts, standard_iterations)
 
     print("Running standard sync tests...")
-    with ThreadPoolExecutor() as executor:
-        sync_results = await asyncio.get_event_loop().run_in_executor(
-            executor, run_sync_tests, base_url, standard_counts, standard_iterations
-        )
+    sync_results = await asyncio.to_thread(run_sync_tests, base_url, standard_counts, standard_iterations)
 
     print("Analyzing standard results...")
     async_analysis = analyze_results(async_results, "asyncpg")
     sync_analysis = analyze_results(sync_results, "psycopg2")
+    append_rows("benchmark_report.jsonl", async_analysis + sync_analysis, mode="wb")
 
     print("Generating standard report...")
     standard_report = generate_report(async_analysis, sync_analysis, "standard")
 
     # Run mixed tests (INSERT, UPDATE, DELETE, GET)
     print("\nRunning mixed async tests...")
-    async_mixed_results = await run_async_mixed_tests(base_url, mixed_counts, mixed_iterations)
+    async_mixed_results = await run_async_mixed_tests(session, base_url, mixed_counts, mixed_iterations)
 
     print("Running mixed sync tests...")
-    with ThreadPoolExecutor() as executor:
-        sync_mixed_results = await asyncio.get_event_loop().run_in_executor(
-            executor, run_sync_mixed_tests, base_url, mixed_counts, mixed_iterations
-        )
+    sync_mixed_results = await asyncio.to_thread(run_sync_mixed_tests, base_url, mixed_counts, mixed_iterations)
 
     print("Analyzing mixed results...")
     async_mixed_analysis = analyze_results(async_mixed_results, "asyncpg_mixed")
     sync_mixed_analysis = analyze_results(sync_mixed_results, "psycopg2_mixed")
+    append_rows("benchmark_report.jsonl", async_mixed_analysis + sync_mixed_analysis)
 
     print("Generating mixed report...")
     mixed_report = generate_report(async_mixed_analysis, sync_mixed_analysis, "mixed")
@@ -811,10 +927,9 @@ async def main():
         combined_report["advanced"] = advanced_report
 
     # Save to file
-    with open("benchmark_report.json", "w") as f:
-        json.dump(combined_report, f, indent=2)
+    dump_report("benchmark_report.json", combined_report)
 
-    print("\nBenchmark tests completed. Results saved to benchmark_report.json")
+    print("\nBenchmark tests completed. Results saved to benchmark_report.json and benchmark_report.jsonl")
 
     # Print overall summary
     print("\n=== OVERALL SUMMARY ===")
@@ -849,6 +964,8 @@ async def main():
     else:
         print("\nAdvanced benchmarks were not completed due to errors.")
 
+    await aclose()
+
 
 async def test_advanced_benchmarks_only():
     """Function to test only advanced benchmarks."""
@@ -865,9 +982,9 @@ async def test_advanced_benchmarks_only():
         if "complex" in advanced_results and advanced_results["complex"]["async"]:
             print("\nComplex Query Benchmark:")
             for count, result in advanced_results["complex"]["async"].items():
-                if isinstance(count, int) and "error" not in result:
-                    async_ops = result.get("operations_per_second", 0)
-                    sync_ops = advanced_results["complex"]["sync"][count].get("operations_per_second", 0)
+                if not result.err:
+                    async_ops = result.ops
+                    sync_ops = advanced_results["complex"]["sync"][count].ops
 
                     if sync_ops > 0:
                         percentage_diff = ((async_ops - sync_ops) / sync_ops) * 100
@@ -880,28 +997,31 @@ async def test_advanced_benchmarks_only():
         if "concurrent" in advanced_results and advanced_results["concurrent"]["async"]:
             print("\nConcurrent Client Benchmark:")
             for count in advanced_results["concurrent"]["async"]:
-                if isinstance(count, int):
-                    for concurrency, result in advanced_results["concurrent"]["async"][count].items():
-                        if "error" not in result:
-                            async_ops = result.get("operations_per_second", 0)
-                            sync_ops = advanced_results["concurrent"]["sync"][count][concurrency].get(
-                                "operations_per_second", 0
-                            )
+                for concurrency, result in advanced_results["concurrent"]["async"][count].items():
+                    if not result.err:
+                        async_ops = result.ops
+                        sync_ops = advanced_results["concurrent"]["sync"][count][concurrency].ops
 
-                            if sync_ops > 0:
-                                percentage_diff = ((async_ops - sync_ops) / sync_ops) * 100
-                                print(
-                                    f"  Count {count}, Concurrency {concurrency}: asyncpg: {async_ops:.2f} ops/sec, psycopg2: {sync_ops:.2f} ops/sec"
-                                )
-                                print(
-                                    f"  Difference: {percentage_diff:.2f}% ({'asyncpg faster' if percentage_diff > 0 else 'psycopg2 faster'})"
-                                )
+                        if sync_ops > 0:
+                            percentage_diff = ((async_ops - sync_ops) / sync_ops) * 100
+                            print(
+                                f"  Count {count}, Concurrency {concurrency}: asyncpg: {async_ops:.2f} ops/sec, psycopg2: {sync_ops:.2f} ops/sec"
+                            )
+                            print(
+                                f"  Difference: {percentage_diff:.2f}% ({'asyncpg faster' if percentage_diff > 0 else 'psycopg2 faster'})"
+                            )
 
     except Exception as e:
         print(f"Error running advanced benchmarks: {str(e)}")
+    finally:
+        await aclose()
 
 
 if __name__ == "__main__":
+    # Run the driver on uvloop when available so the client side is not the bottleneck
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
     # Sadece gelişmiş benchmarkları test etmek için:
     asyncio.run(test_advanced_benchmarks_only())
 
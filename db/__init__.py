@@ -2,8 +2,11 @@ from db.async_db import (
     SQLALCHEMY_DATABASE_URL,
     Base,
     async_session,
+    create_raw_pool,
+    fetch_prepared,
     get_db,
     get_db_session,
+    get_raw_pool,
 )
 from db.sync_db import get_db_session_sync, get_db_sync
 
@@ -15,4 +18,7 @@ __all__ = [
     "get_db_session_sync",
     "get_db_sync",
     "async_session",
+    "create_raw_pool",
+    "fetch_prepared",
+    "get_raw_pool",
 ]
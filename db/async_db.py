@@ -1,26 +1,63 @@
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
+import asyncpg
+from fastapi import Request
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import NullPool
 
 from settings import settings
 
+# With PGBOUNCER enabled the async driver talks to PgBouncer instead of Postgres directly
+if settings.PGBOUNCER:
+    DB_HOST, DB_PORT = settings.PGBOUNCER_HOST, settings.PGBOUNCER_PORT
+else:
+    DB_HOST, DB_PORT = settings.POSTGRES_HOST, settings.POSTGRES_PORT
+
 SQLALCHEMY_DATABASE_URL = (
     f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@"
-    f"{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
+    f"{DB_HOST}:{DB_PORT}/{settings.POSTGRES_DB}"
 )
 
+# Plain DSN for the raw asyncpg pool used by the read-only hot paths
+ASYNCPG_DSN = SQLALCHEMY_DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+
+if settings.PGBOUNCER:
+    # PgBouncer does the pooling and may hand every transaction to a different backend, so keep
+    # no pool here and no named prepared statements that the next backend would not know about
+    ENGINE_OPTIONS = {
+        "poolclass": NullPool,
+        "connect_args": {"statement_cache_size": 0, "prepared_statement_cache_size": 0},
+    }
+else:
+    # No liveness SELECT on every checkout; pool_recycle already retires long-lived connections.
+    # Larger statement caches keep every benchmark query on asyncpg's prepared fast path, and JIT
+    # compilation costs more than it saves on these short OLTP queries.
+    # Connection budget: each of the four gunicorn workers can hold this pool (25), the raw pool (20) and
+    # the sync pool (24), 4 x 69 = 276 connections against Postgres' max_connections=300.
+    ENGINE_OPTIONS = {
+        "pool_size": 5,
+        "max_overflow": 20,
+        "pool_timeout": 60,
+        "pool_recycle": 3600,
+        "pool_pre_ping": False,
+        # LIFO checkout reuses the same warm connections, and with them their prepared statements
+        "pool_use_lifo": True,
+        "connect_args": {
+            "statement_cache_size": 1024,
+            "prepared_statement_cache_size": 1024,
+            "server_settings": {"jit": "off"},
+        },
+    }
+
 engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
-    pool_size=5,
-    max_overflow=20,
-    pool_timeout=60,
-    pool_recycle=3600,
+    **ENGINE_OPTIONS,
     echo=False,
     echo_pool=False,
     future=True,
@@ -43,3 +80,31 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
             yield session
         finally:
             await session.close()
+
+
+# Hot read-only queries; the raw pool's statement cache prepares each once per connection
+PREPARED_QUERIES = {
+    "users_all": "SELECT id, username, email, full_name FROM users",
+    "products_all": "SELECT id, name, price, sku FROM products",
+    # Trigger-maintained write counters: a primary-key lookup instead of aggregating over the table
+    "users_version": "SELECT version FROM table_versions WHERE table_name = 'users'",
+    "products_version": "SELECT version FROM table_versions WHERE table_name = 'products'",
+}
+
+
+async def fetch_prepared(conn: asyncpg.Connection, name: str) -> list[asyncpg.Record]:
+    """Run one of PREPARED_QUERIES; asyncpg prepares and caches the statement on first use."""
+    return await conn.fetch(PREPARED_QUERIES[name])
+
+
+async def create_raw_pool() -> asyncpg.Pool:
+    return await asyncpg.create_pool(
+        ASYNCPG_DSN,
+        min_size=5,
+        max_size=20,
+        statement_cache_size=0 if settings.PGBOUNCER else 100,
+    )
+
+
+def get_raw_pool(request: Request) -> asyncpg.Pool:
+    return request.app.state.pg_pool
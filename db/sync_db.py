@@ -14,10 +14,18 @@ SQLALCHEMY_DATABASE_URL = (
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    pool_size=5,
-    max_overflow=20,
+    # Room for the threaded benchmarks: the request session plus at most 23 worker threads (api/sync_api/router.py)
+    pool_size=16,
+    max_overflow=8,
     pool_timeout=60,
     pool_recycle=3600,
+    # No liveness SELECT on every checkout; pool_recycle already retires long-lived connections
+    pool_pre_ping=False,
+    # Hand out the most recently returned connection so a small hot set stays warm under bursty load
+    pool_use_lifo=True,
+    # Batch executemany INSERTs into multi-row VALUES pages and other executemany calls with execute_batch
+    executemany_mode="values_plus_batch",
+    insertmanyvalues_page_size=1000,
     echo=False,
     echo_pool=False,
 )
@@ -41,3 +49,4 @@ def get_db_session_sync() -> Generator[Session, Any, None]:
         yield db
     finally:
         db.close()
+
@@ -4,17 +4,22 @@ from typing import AsyncGenerator
 import anyio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from api.async_api.router import router as async_router
 from api.sync_api.router import router as sync_router
+from db import create_raw_pool
+from settings import settings
 
 
 # App Lifespan
 @asynccontextmanager
 async def lifespan(_app: FastAPI) -> AsyncGenerator[None, None]:
     limiter = anyio.to_thread.current_default_thread_limiter()
-    limiter.total_tokens = 100
+    limiter.total_tokens = settings.THREADPOOL_SIZE
+    _app.state.pg_pool = await create_raw_pool()
     yield
+    await _app.state.pg_pool.close()
 
 
 # APP Configuration
@@ -23,6 +28,7 @@ app = FastAPI(
     version="1.0.0",
     openapi_url="/openapi.json",
     swagger_ui_parameters={"defaultModelsExpandDepth": -1},
+    default_response_class=ORJSONResponse,
     lifespan=lifespan,
 )
 
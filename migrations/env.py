@@ -29,13 +29,16 @@ target_metadata = Base.metadata
 
 
 def get_url():
-    from db import SQLALCHEMY_DATABASE_URL
+    # Always the direct Postgres URL: DDL, CONCURRENTLY builds and the jit startup option do not go
+    # through PgBouncer's transaction pooling, which the async URL points at when PGBOUNCER is set
+    from db.sync_db import SQLALCHEMY_DATABASE_URL
 
-    return SQLALCHEMY_DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+    return SQLALCHEMY_DATABASE_URL
 
 
-def include_object(object, name, type_, reflected, compare_to):
-    ignore_tables = [
+# Tables owned by other apps sharing the database; built once instead of on every include_object call
+IGNORE_TABLES = frozenset(
+    {
         "django_admin_log",
         "auth_group",
         "auth_user_groups",
@@ -57,8 +60,13 @@ def include_object(object, name, type_, reflected, compare_to):
         "django_celery_results_taskresult",
         "celery_taskmeta",
         "celery_tasksetmeta",
-    ]
-    if type_ == "table" and (name in ignore_tables or re.match(r"^(fastapi_transaction|fastapi_game_launch)", name)):  # noqa
+    }
+)
+IGNORE_TABLE_PREFIX = re.compile(r"^(fastapi_transaction|fastapi_game_launch)").match
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and (name in IGNORE_TABLES or IGNORE_TABLE_PREFIX(name)):
         return False
     else:
         return True
@@ -98,10 +106,13 @@ def run_migrations_online() -> None:
     """
     configuration = config.get_section(config.config_ini_section)
     configuration["sqlalchemy.url"] = get_url()
+    # A migration run holds one connection throughout, so NullPool costs a single connect; JIT off keeps
+    # the many short reflection queries from paying compilation time
     connectable = engine_from_config(
         configuration,
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
+        connect_args={"options": "-c jit=off"},
     )
     with connectable.connect() as connection:
         context.configure(
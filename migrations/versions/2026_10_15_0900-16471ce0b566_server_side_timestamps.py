@@ -0,0 +1,44 @@
+"""server side timestamps
+
+Revision ID: 16471ce0b566
+Revises: 661c6221fef4
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "16471ce0b566"
+down_revision = "661c6221fef4"
+branch_labels = None
+depends_on = None
+
+TABLES = ("users", "products")
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION set_updated_date() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_date = now();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in TABLES:
+        op.alter_column(table, "updated_date", server_default=sa.text("now()"))
+        op.execute(
+            f"CREATE TRIGGER {table}_set_updated_date BEFORE UPDATE ON {table} "
+            "FOR EACH ROW EXECUTE FUNCTION set_updated_date()"
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_set_updated_date ON {table}")
+        op.alter_column(table, "updated_date", server_default=None)
+    op.execute("DROP FUNCTION IF EXISTS set_updated_date()")
@@ -0,0 +1,45 @@
+"""timestamps with time zone
+
+Revision ID: e9ab64c8e9d5
+Revises: 16471ce0b566
+Create Date: 2026-10-15 09:10:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e9ab64c8e9d5"
+down_revision = "16471ce0b566"
+branch_labels = None
+depends_on = None
+
+TABLES = ("users", "products")
+COLUMNS = ("created_date", "updated_date", "deleted_date")
+
+
+def upgrade() -> None:
+    # Existing naive values were written by a UTC database server, so cast them as UTC. timestamptz is
+    # the same 8 bytes, and with the session in UTC a plain cast (no USING) skips the table rewrite.
+    op.execute("SET LOCAL TIME ZONE 'UTC'")
+    for table in TABLES:
+        for column in COLUMNS:
+            op.alter_column(
+                table,
+                column,
+                type_=sa.DateTime(timezone=True),
+                existing_type=sa.DateTime(),
+            )
+
+
+def downgrade() -> None:
+    op.execute("SET LOCAL TIME ZONE 'UTC'")
+    for table in TABLES:
+        for column in COLUMNS:
+            op.alter_column(
+                table,
+                column,
+                type_=sa.DateTime(),
+                existing_type=sa.DateTime(timezone=True),
+            )
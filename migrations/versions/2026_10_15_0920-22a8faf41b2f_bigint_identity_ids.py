@@ -0,0 +1,40 @@
+"""bigint identity ids
+
+Revision ID: 22a8faf41b2f
+Revises: e9ab64c8e9d5
+Create Date: 2026-10-15 09:20:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "22a8faf41b2f"
+down_revision = "e9ab64c8e9d5"
+branch_labels = None
+depends_on = None
+
+TABLES = ("users", "products")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        # Swap the serial default for an identity column, restarting it after the current rows
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT")
+        op.execute(f"DROP SEQUENCE IF EXISTS {table}_id_seq")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id TYPE bigint")
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY (START WITH 1 CACHE 1000)"
+        )
+        op.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 0) + 1, false) FROM {table}"
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id DROP IDENTITY IF EXISTS")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id TYPE integer")
+        op.execute(f"CREATE SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        op.execute(f"SELECT setval('{table}_id_seq', coalesce(max(id), 0) + 1, false) FROM {table}")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{table}_id_seq')")
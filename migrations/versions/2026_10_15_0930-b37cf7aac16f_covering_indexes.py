@@ -0,0 +1,51 @@
+"""covering indexes
+
+Revision ID: b37cf7aac16f
+Revises: 22a8faf41b2f
+Create Date: 2026-10-15 09:30:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b37cf7aac16f"
+down_revision = "22a8faf41b2f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY builds cannot run in a transaction. A failed build leaves an INVALID index behind,
+    # so each one is dropped first and a re-run starts clean.
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_products_price_cover", table_name="products", postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            "ix_products_price_cover",
+            "products",
+            ["price"],
+            postgresql_include=["id", "name", "sku"],
+            postgresql_concurrently=True,
+        )
+        # Build the covering username index next to the old one so uniqueness (and the ON CONFLICT
+        # arbiter) is never missing, then swap names
+        op.drop_index("ix_users_username_cover", table_name="users", postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            "ix_users_username_cover",
+            "users",
+            ["username"],
+            unique=True,
+            postgresql_include=["email"],
+            postgresql_concurrently=True,
+        )
+        op.drop_index("ix_users_username", table_name="users", postgresql_concurrently=True, if_exists=True)
+        op.execute("ALTER INDEX ix_users_username_cover RENAME TO ix_users_username")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_users_username_plain", table_name="users", postgresql_concurrently=True, if_exists=True)
+        op.create_index("ix_users_username_plain", "users", ["username"], unique=True, postgresql_concurrently=True)
+        op.drop_index("ix_users_username", table_name="users", postgresql_concurrently=True, if_exists=True)
+        op.execute("ALTER INDEX ix_users_username_plain RENAME TO ix_users_username")
+        op.drop_index("ix_products_price_cover", table_name="products", postgresql_concurrently=True, if_exists=True)
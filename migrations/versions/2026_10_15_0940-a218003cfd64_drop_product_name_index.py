@@ -0,0 +1,28 @@
+"""drop product name index
+
+Revision ID: a218003cfd64
+Revises: b37cf7aac16f
+Create Date: 2026-10-15 09:40:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a218003cfd64"
+down_revision = "b37cf7aac16f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # No query filters or sorts on products.name, so the index only slows down writes
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_products_name", table_name="products", postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    # Dropping a leftover INVALID build first makes re-runs safe
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_products_name", table_name="products", postgresql_concurrently=True, if_exists=True)
+        op.create_index("ix_products_name", "products", ["name"], postgresql_concurrently=True)
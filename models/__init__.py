@@ -1,9 +1,11 @@
 from models.base import BaseModel
 from models.product import Product
+from models.table_version import TableVersion
 from models.user import User
 
 __all__ = [
     "BaseModel",
     "User",
     "Product",
+    "TableVersion",
 ]
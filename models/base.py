@@ -1,14 +1,26 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, Integer, func
+from sqlalchemy import BigInteger, DateTime, FetchedValue, Identity, func
+from sqlalchemy.orm import Mapped, mapped_column
 
 from db import Base
 
 
 class BaseModel(Base):
     __abstract__ = True
+    # Never fetch server-generated timestamps back after a flush; callers that need them use RETURNING
+    __mapper_args__ = {"eager_defaults": False}
 
-    id = Column(Integer, primary_key=True)
-    created_date = Column(DateTime, default=datetime.now, server_default=func.now())
-    updated_date = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-    deleted_date = Column(DateTime, nullable=True)
+    # Identity with a sequence cache: each backend reserves 1000 ids per nextval, so bulk inserts from
+    # concurrent connections do not serialize on the sequence (ids are unique but not strictly ordered)
+    id: Mapped[int] = mapped_column(BigInteger, Identity(always=False, start=1, cache=1000), primary_key=True)
+    # Timestamps are filled in by Postgres (column defaults plus the set_updated_date trigger), so bulk
+    # inserts and updates bind no per-row Python values for them. No API response includes them, so they
+    # are deferred out of entity SELECTs and only loaded when accessed.
+    created_date: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), deferred=True
+    )
+    updated_date: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), server_onupdate=FetchedValue(), deferred=True
+    )
+    deleted_date: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), deferred=True)
@@ -1,12 +1,18 @@
-from sqlalchemy import Column, Float, String, Text
+from sqlalchemy import Float, Index, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
 
 from models.base import BaseModel
 
 
 class Product(BaseModel):
     __tablename__ = "products"
+    __table_args__ = (
+        # Covers the price-filtered and price-ordered product reads, so they skip the heap and the sort
+        Index("ix_products_price_cover", "price", postgresql_include=["id", "name", "sku"]),
+    )
 
-    name = Column(String, index=True)
-    description = Column(Text, nullable=True)
-    price = Column(Float, nullable=False)
-    sku = Column(String, unique=True, index=True)
+    name: Mapped[str | None] = mapped_column(String)
+    # Free text that no list or benchmark read needs; only loaded when accessed
+    description: Mapped[str | None] = mapped_column(Text, deferred=True)
+    price: Mapped[float] = mapped_column(Float)
+    sku: Mapped[str | None] = mapped_column(String, unique=True, index=True)
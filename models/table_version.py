@@ -0,0 +1,13 @@
+from sqlalchemy import BigInteger, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from db import Base
+
+
+class TableVersion(Base):
+    """Write counter per table, bumped by a statement-level trigger on every write to that table."""
+
+    __tablename__ = "table_versions"
+
+    table_name: Mapped[str] = mapped_column(Text, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, server_default="0")
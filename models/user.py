@@ -1,11 +1,16 @@
-from sqlalchemy import Column, String
+from sqlalchemy import Index, String
+from sqlalchemy.orm import Mapped, mapped_column
 
 from models.base import BaseModel
 
 
 class User(BaseModel):
     __tablename__ = "users"
+    __table_args__ = (
+        # Unique on username and covering email, so the username-ordered listing is an index-only scan
+        Index("ix_users_username", "username", unique=True, postgresql_include=["email"]),
+    )
 
-    username = Column(String, unique=True, index=True)
-    email = Column(String, unique=True, index=True)
-    full_name = Column(String, nullable=True)
+    username: Mapped[str | None] = mapped_column(String)
+    email: Mapped[str | None] = mapped_column(String, unique=True, index=True)
+    full_name: Mapped[str | None] = mapped_column(String)
@@ -0,0 +1,9 @@
+from schemas.product import ProductList, ProductOut
+from schemas.user import UserList, UserOut
+
+__all__ = [
+    "UserOut",
+    "UserList",
+    "ProductOut",
+    "ProductList",
+]
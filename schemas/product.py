@@ -0,0 +1,14 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class ProductOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str | None = None
+    price: float
+    sku: str | None = None
+
+
+class ProductList(BaseModel):
+    products: list[ProductOut]
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, ConfigDict
+
+
+class UserOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    username: str
+    email: str
+    full_name: str | None = None
+
+
+class UserList(BaseModel):
+    users: list[UserOut]
@@ -1,4 +1,6 @@
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Config(BaseSettings):
@@ -9,9 +11,25 @@ class Config(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PORT: int
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    # PGBOUNCER (transaction pooling in front of the async driver)
+    PGBOUNCER: bool = False
+    PGBOUNCER_HOST: str = "pgbouncer"
+    PGBOUNCER_PORT: int = 6432
+
+    # SERVER (worker threads available to the sync endpoints)
+    THREADPOOL_SIZE: int = 100
+
+    # CACHE
+    RESPONSE_CACHE_TTL: int = 30
+
+    # Frozen: settings are read-only once loaded, so nothing can drift from what the process started with
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True, frozen=True)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Config:
+    """Load the environment and .env once per process and hand back the same instance afterwards."""
+    return Config()
 
 
-settings = Config()
+settings = get_settings()
@@ -0,0 +1,7 @@
+from uvicorn.workers import UvicornWorker
+
+
+class UvloopWorker(UvicornWorker):
+    """Uvicorn worker pinned to uvloop and httptools instead of auto-detecting them."""
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}